@@ -1,8 +1,15 @@
 import os
-import yaml
-from collections import defaultdict
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import csv
 
+from modules.yaml_utils import load_yaml_file
+
+# Matches a [group] section header on an already-stripped hosts.ini line
+GROUP_HEADER_RE = re.compile(r"^\[(.*)\]$")
+
 
 def save_analysis_to_csv(analysis_results, output_csv="inventory_analysis.csv"):
     """Save the analysis results to a CSV file."""
@@ -20,13 +27,13 @@ def save_analysis_to_csv(analysis_results, output_csv="inventory_analysis.csv"):
     # Open the CSV file for writing
     with open(output_csv, mode='w', newline='') as csv_file:
         writer = csv.writer(csv_file)
-        
+
         # Write the header row
         writer.writerow(headers)
-        
-        # Write the data rows
-        for host, data in analysis_results.items():
-            writer.writerow([
+
+        # Stream the data rows through writerows without materializing a list
+        writer.writerows(
+            (
                 host,
                 data.get("Groups", "N/A"),
                 data.get("Duplicated Variables", "N/A"),
@@ -34,83 +41,114 @@ def save_analysis_to_csv(analysis_results, output_csv="inventory_analysis.csv"):
                 data.get("Duplicated Host", "N/A"),
                 data.get("Missing File in host_vars", "N/A"),
                 data.get("Orphaned Host Var", "No")
-            ])
+            )
+            for host, data in analysis_results.items()
+        )
 
     print(f"Analysis results saved to {output_csv}")
 
 
-def load_yaml_file(file_path):
-    """Loads a YAML file and returns its content."""
-    with open(file_path, 'r') as file:
-        try:
-            return yaml.safe_load(file) or {}
-        except yaml.YAMLError as exc:
-            print(f"Error loading {file_path}: {exc}")
-            return {}
-
-def load_all_vars(dir_path):
-    """Loads all YAML files from a directory and returns a dictionary with their content."""
-    vars_data = {}
-    for file_name in os.listdir(dir_path):
-        if file_name.endswith('.yaml') or file_name.endswith('.yml'):
-            full_path = os.path.join(dir_path, file_name)
-            vars_data[file_name] = load_yaml_file(full_path)
-    return vars_data
-
-def check_duplicate_vars(group_vars, host_vars):
-    """Checks for duplicate variables between group_vars and host_vars."""
-    duplicates = defaultdict(list)
+@lru_cache(maxsize=None)
+def index_host_vars(host_vars_dir):
+    """Scan host_vars once and return the set of host names that have a vars file.
+
+    A single os.scandir replaces the repeated os.path.exists checks for the
+    .yaml/.yml variants of every host; membership tests on the returned set are
+    O(1) and cost no further syscalls. The result is cached per directory for
+    the lifetime of the process.
+    """
+    with os.scandir(host_vars_dir) as entries:
+        return frozenset(
+            os.path.splitext(entry.name)[0]
+            for entry in entries
+            if entry.is_file() and entry.name.endswith(('.yaml', '.yml'))
+        )
+
+def load_all_vars(dir_path, strip_ext=False):
+    """Loads all YAML files from a directory and returns a dictionary with their content.
+
+    Files are parsed concurrently with a thread pool: each load is an
+    independent open/read/parse and the GIL is released during file I/O,
+    so wall time scales with the slowest file rather than the sum.
+
+    With strip_ext=True the keys are the bare host names instead of file
+    names, so consumers never have to re-split the extension per lookup.
+    """
+    file_names = [f for f in os.listdir(dir_path) if f.endswith(('.yaml', '.yml'))]
+    if not file_names:
+        return {}
+    keys = [os.path.splitext(f)[0] for f in file_names] if strip_ext else file_names
+    with ThreadPoolExecutor(max_workers=min(32, len(file_names))) as executor:
+        contents = executor.map(
+            lambda f: load_yaml_file(os.path.join(dir_path, f)), file_names
+        )
+        return dict(zip(keys, contents))
+
+def build_group_index(group_vars):
+    """Build an index mapping each variable name to the (group_file, value) pairs defining it."""
+    group_index = defaultdict(list)
     for group_file, group_data in group_vars.items():
-        for host_file, host_data in host_vars.items():
-            host_name = os.path.splitext(host_file)[0]  # Strip the .yaml/.yml extension
-            for var in group_data:
-                if var in host_data:
-                    duplicates[var].append((group_file, host_name))
-    return duplicates
-
-def check_inconsistent_values(group_vars, host_vars):
-    """Checks for inconsistencies in variable values between group_vars and host_vars."""
+        for var, value in group_data.items():
+            group_index[var].append((group_file, value))
+    return group_index
+
+def check_vars(group_vars, host_vars):
+    """Checks host_vars against group_vars in a single pass, returning duplicates and inconsistencies.
+
+    Instead of scanning every group file for every host file, the group variables
+    are indexed once by name and each host only visits the variables it actually
+    shares with a group (set intersection on the dict keys). host_vars is
+    expected to be keyed by host name, as produced by
+    load_all_vars(..., strip_ext=True).
+    """
+    duplicates = defaultdict(list)
     inconsistencies = defaultdict(list)
-    for group_file, group_data in group_vars.items():
-        for host_file, host_data in host_vars.items():
-            host_name = os.path.splitext(host_file)[0]  # Strip the .yaml/.yml extension
-            for var, group_value in group_data.items():
-                if var in host_data and host_data[var] != group_value:
+    group_index = build_group_index(group_vars)
+
+    for host_name, host_data in host_vars.items():
+        # Sorted so the output order does not depend on hash randomization
+        for var in sorted(host_data.keys() & group_index.keys()):
+            for group_file, group_value in group_index[var]:
+                duplicates[var].append((group_file, host_name))
+                if host_data[var] != group_value:
                     inconsistencies[var].append({
                         "group_file": group_file,
                         "host_file": host_name,
                         "group_value": group_value,
                         "host_value": host_data[var]
                     })
-    return inconsistencies
+    return duplicates, inconsistencies
+
+def check_duplicate_vars(group_vars, host_vars):
+    """Checks for duplicate variables between group_vars and host_vars."""
+    return check_vars(group_vars, host_vars)[0]
+
+def check_inconsistent_values(group_vars, host_vars):
+    """Checks for inconsistencies in variable values between group_vars and host_vars."""
+    return check_vars(group_vars, host_vars)[1]
 
 def find_duplicates(groups):
     """Identify hosts that appear multiple times within the same group."""
     duplicated_hosts = defaultdict(list)
 
     for group, hosts in groups.items():
-        # Count each host occurrence within the group
-        host_counts = Counter(hosts)
-        for host, count in host_counts.items():
-            if count > 1:  # Host appears more than once in this group
+        # Count each host occurrence within the group; only hosts appearing
+        # more than once are recorded, so no post-filter pass is needed
+        for host, count in Counter(hosts).items():
+            if count > 1:
                 duplicated_hosts[host].append(group)
 
-    # Filter to only include hosts with duplicates within groups
-    duplicated_hosts = {host: group_list for host, group_list in duplicated_hosts.items() if group_list}
-
-    return duplicated_hosts
+    return dict(duplicated_hosts)
 
 def find_inconsistent_hosts(host_groups, inventory_base_path):
     """Identify hosts that are in hosts.ini but don't have a corresponding file in host_vars."""
     host_vars_dir = os.path.join(inventory_base_path, "host_vars")
+    existing_hosts = index_host_vars(host_vars_dir)
     inconsistent_hosts = []
 
     for host in host_groups:
-        # Check for the existence of corresponding .yaml or .yml file in host_vars
-        host_file_yaml = os.path.join(host_vars_dir, f"{host}.yaml")
-        host_file_yml = os.path.join(host_vars_dir, f"{host}.yml")
-        
-        if not (os.path.exists(host_file_yaml) or os.path.exists(host_file_yml)):
+        # Check for the existence of a corresponding .yaml or .yml file in host_vars
+        if host not in existing_hosts:
             inconsistent_hosts.append(host)
 
     return inconsistent_hosts
@@ -121,12 +159,10 @@ def find_orphaned_host_vars(host_groups, inventory_base_path):
     defined_hosts = set(host_groups.keys())  # Hosts defined in hosts.ini
     orphaned_hosts = []
 
-    # Iterate over files in host_vars to find hosts without entries in hosts.ini
-    for file_name in os.listdir(host_vars_dir):
-        if file_name.endswith(('.yaml', '.yml')):
-            host_name = os.path.splitext(file_name)[0]  # Remove the extension
-            if host_name not in defined_hosts:
-                orphaned_hosts.append(host_name)
+    # Iterate over hosts in host_vars to find those without entries in hosts.ini
+    for host_name in index_host_vars(host_vars_dir):
+        if host_name not in defined_hosts:
+            orphaned_hosts.append(host_name)
 
     return orphaned_hosts
 
@@ -137,33 +173,33 @@ def parse_hosts_ini(inventory_base_path):
 
     hosts = defaultdict(dict)
     groups = defaultdict(list)
+    existing_hosts = index_host_vars(host_vars_dir)
 
     current_group = None
 
-    with open(hosts_ini_path, 'r') as file:
+    # A generous read buffer keeps large inventories to a handful of syscalls
+    with open(hosts_ini_path, 'r', buffering=1 << 16) as file:
         for line in file:
             line = line.strip()
-            if not line or line.startswith("#"):
+            if not line or line[0] == "#":
                 # Skip comments or empty lines
                 continue
-            
-            # Detect a new group section
-            if line.startswith("[") and line.endswith("]"):
-                current_group = line[1:-1].strip()
-                groups[current_group] = []
-            elif current_group:
-                # Process each host entry, allowing duplicates
-                if ' ' in line:  # If host has inline variables
-                    host_name = line.split()[0].strip()
-                else:
-                    host_name = line
-                
-                # Check if a corresponding host_vars file exists
-                host_file_yaml = os.path.join(host_vars_dir, f"{host_name}.yaml")
-                host_file_yml = os.path.join(host_vars_dir, f"{host_name}.yml")
+
+            # Detect a new group section; the cheap first-character test keeps
+            # the regex off the (far more common) host lines
+            if line[0] == "[":
+                group_match = GROUP_HEADER_RE.match(line)
+                if group_match:
+                    current_group = group_match.group(1).strip()
+                    groups[current_group] = []
+                    continue
+            if current_group:
+                # Process each host entry (first token, before any inline
+                # variables), allowing duplicates
+                host_name = line.split(None, 1)[0]
 
                 # Only add host if a corresponding file is found in host_vars
-                if os.path.exists(host_file_yaml) or os.path.exists(host_file_yml):
+                if host_name in existing_hosts:
                     groups[current_group].append(host_name)
                     hosts[host_name].setdefault('groups', []).append(current_group)
 
@@ -175,65 +211,66 @@ def analyze_inventory(inventory_base_path,save_csv=False):
     # Parse the hosts.ini file to get host-group associations
     hosts, groups = parse_hosts_ini(inventory_base_path)
 
-    # Load group_vars and host_vars directories
+    # Load group_vars and index it by variable name
     group_vars_dir = os.path.join(inventory_base_path, "group_vars")
     host_vars_dir = os.path.join(inventory_base_path, "host_vars")
-    group_vars = load_all_vars(group_vars_dir)
-    host_vars = load_all_vars(host_vars_dir)
-
-    # Check for duplicate and inconsistent variables
-    duplicate_vars = check_duplicate_vars(group_vars, host_vars)
-    inconsistent_values = check_inconsistent_values(group_vars, host_vars)
+    group_index = build_group_index(load_all_vars(group_vars_dir))
+
+    # Fused pass over host_vars: each file is probed against the group index
+    # as soon as it is parsed and then discarded, building the per-host
+    # conflict buckets directly without retaining a host_vars dict or walking
+    # it again afterwards. The thread pool only does the I/O + parse; the
+    # probing runs in the main thread as results stream in.
+    dup_by_host = {}
+    inc_by_host = {}
+    host_file_names = [f for f in os.listdir(host_vars_dir) if f.endswith(('.yaml', '.yml'))]
+    if host_file_names:
+        with ThreadPoolExecutor(max_workers=min(32, len(host_file_names))) as executor:
+            loaded = executor.map(
+                lambda f: load_yaml_file(os.path.join(host_vars_dir, f)), host_file_names
+            )
+            for file_name, host_data in zip(host_file_names, loaded):
+                host = os.path.splitext(file_name)[0]
+                # Sorting only the matched vars keeps the report order stable
+                # across runs (set iteration order is hash-seed-dependent)
+                for var in sorted(host_data.keys() & group_index.keys()):
+                    for group_file, group_value in group_index[var]:
+                        dup_by_host.setdefault(host, []).append(f"{var} (in {group_file} and {host})")
+                        if host_data[var] != group_value:
+                            inc_by_host.setdefault(host, []).append(
+                                f"{var} ({group_file} value = {group_value}, "
+                                f"{host} value = {host_data[var]})"
+                            )
 
     # Prepare the results dictionary
     analysis_results = {}
-    duplicated_hosts = {host: groups for host, groups in hosts.items() if len(groups['groups']) > 1}
-    missing_files = []
-    orphaned_files = []
-
-    # Check for missing files in host_vars
-    for host in hosts:
-        host_file_yaml = os.path.join(host_vars_dir, f"{host}.yaml")
-        host_file_yml = os.path.join(host_vars_dir, f"{host}.yml")
-        
-        if not (os.path.exists(host_file_yaml) or os.path.exists(host_file_yml)):
-            missing_files.append(host)
-
-    # Check for orphaned files in host_vars (files without corresponding entry in hosts.ini)
-    defined_hosts = set(hosts.keys())
-    for file_name in os.listdir(host_vars_dir):
-        if file_name.endswith(('.yaml', '.yml')):
-            host_name = os.path.splitext(file_name)[0]  # Remove the extension
-            if host_name not in defined_hosts:
-                orphaned_files.append(host_name)
-
-    # Analyze and collect duplicates and inconsistencies for each host
+    # Map each multi-group host straight to its group list; no need to keep
+    # the full details dict (and the old comprehension shadowed `groups`)
+    duplicated_host_groups = {host: details['groups'] for host, details in hosts.items() if len(details['groups']) > 1}
+
+    # Missing and orphaned hosts both fall out of the cached host_vars index:
+    # no further directory walks or per-host stat calls are needed
+    existing_hosts = index_host_vars(host_vars_dir)
+    missing_files = {host for host in hosts if host not in existing_hosts}
+    # Sorted so orphaned rows keep a stable order run to run; the index is a
+    # frozenset whose iteration order depends on hash randomization
+    orphaned_files = sorted(host_name for host_name in existing_hosts if host_name not in hosts)
+
+    # Analyze and collect duplicates and inconsistencies for each host.
+    # Pre-bind the join methods so the hot loop avoids repeated attribute
+    # lookups, and use plain .get(host) so conflict-free hosts allocate nothing
+    join_comma = ", ".join
+    join_semi = "; ".join
     for host, details in hosts.items():
-        related_groups = details['groups']
-        duplicated_vars = []
-        inconsistent_vars = []
-
-        # Collect duplicates specific to this host
-        for var, files in duplicate_vars.items():
-            for group_file, host_file in files:
-                if host_file == host:
-                    duplicated_vars.append(f"{var} (in {group_file} and {host_file})")
-
-        # Collect inconsistencies specific to this host
-        for var, conflicts in inconsistent_values.items():
-            for conflict in conflicts:
-                if conflict["host_file"] == host:
-                    inconsistent_vars.append(
-                        f"{var} ({conflict['group_file']} value = {conflict['group_value']}, "
-                        f"{host} value = {conflict['host_value']})"
-                    )
+        duplicated_vars = dup_by_host.get(host)
+        inconsistent_vars = inc_by_host.get(host)
 
         # Add results for this host to the dictionary
         analysis_results[host] = {
-            "Groups": ", ".join(related_groups),
-            "Duplicated Variables": "; ".join(duplicated_vars) if duplicated_vars else "No duplicated variables",
-            "Inconsistent Variables": "; ".join(inconsistent_vars) if inconsistent_vars else "No inconsistent variables",
-            "Duplicated Host": ", ".join(duplicated_hosts[host]['groups']) if host in duplicated_hosts else "No duplication in groups",
+            "Groups": join_comma(details['groups']),
+            "Duplicated Variables": join_semi(duplicated_vars) if duplicated_vars else "No duplicated variables",
+            "Inconsistent Variables": join_semi(inconsistent_vars) if inconsistent_vars else "No inconsistent variables",
+            "Duplicated Host": join_comma(duplicated_host_groups[host]) if host in duplicated_host_groups else "No duplication in groups",
             "Missing File in host_vars": "Yes" if host in missing_files else "No",
             "Orphaned Host Var": "No"
         }
@@ -0,0 +1,107 @@
+import os
+import re
+from functools import lru_cache
+
+import yaml
+
+# Prefer the libyaml C loader/dumper when PyYAML was built against it;
+# parsing is typically 5-10x faster than the pure-Python implementation.
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+
+# A flat "key: value" mapping line; "key:value" without the space is a plain
+# scalar in YAML, so it deliberately does not match and forces the fallback
+_FLAT_LINE_RE = re.compile(r"^([A-Za-z_][\w.-]*)[ \t]*:(?:[ \t]+(.*?))?[ \t]*$")
+# Unambiguous plain string scalars: starting with a letter rules out numbers,
+# dates and YAML punctuation, so the real parser would return the same text
+_PLAIN_STR_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_ ./-]*$")
+_INT_RE = re.compile(r"^[-+]?(0|[1-9]\d*)$")
+# No exponent forms: PyYAML's 1.1 resolver treats e.g. '1e3' as a string
+_FLOAT_RE = re.compile(r"^[-+]?(\d+\.\d*|\.\d+)$")
+# Words the YAML 1.1 resolver turns into bool/null, in the casings PyYAML accepts
+_SCALAR_WORDS = {
+    "true": True, "True": True, "TRUE": True,
+    "false": False, "False": False, "FALSE": False,
+    "yes": True, "Yes": True, "YES": True,
+    "no": False, "No": False, "NO": False,
+    "on": True, "On": True, "ON": True,
+    "off": False, "Off": False, "OFF": False,
+    "null": None, "Null": None, "NULL": None, "~": None,
+}
+
+def _fast_flat_yaml(text):
+    """Parse a flat scalar-only 'key: value' document without the YAML tokenizer.
+
+    Returns the parsed dict, or None whenever any line needs the real parser
+    (nesting, lists, quoting, anchors, comments on data lines, ambiguous
+    scalars, ...). Most Ansible host_vars files are flat maps of simple
+    scalars, which this handles ~an order of magnitude faster than libyaml.
+    """
+    result = {}
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if raw_line[0] in " \t":
+            return None  # indentation means nesting; not a flat map
+        match = _FLAT_LINE_RE.match(line)
+        if match is None:
+            return None
+        key, value = match.group(1), match.group(2)
+        if key in _SCALAR_WORDS:
+            return None  # the resolver would turn this key into a bool/null
+        if value is None or value == "":
+            result[key] = None
+        elif value in _SCALAR_WORDS:
+            result[key] = _SCALAR_WORDS[value]
+        elif _INT_RE.match(value):
+            result[key] = int(value)
+        elif _FLOAT_RE.match(value):
+            result[key] = float(value)
+        elif _PLAIN_STR_RE.match(value):
+            result[key] = value
+        else:
+            return None
+    return result
+
+@lru_cache(maxsize=None)
+def _load_yaml_cached(file_path, mtime):
+    """Parse a YAML file, cached on (path, mtime) so unchanged files parse once."""
+    with open(file_path, 'r') as file:
+        text = file.read()
+    # Fast path for flat scalar maps; anything it cannot prove equivalent
+    # falls through to the full parser
+    data = _fast_flat_yaml(text)
+    if data is not None:
+        return data
+    try:
+        return yaml.load(text, Loader=SafeLoader) or {}
+    except yaml.YAMLError as exc:
+        print(f"Error loading {file_path}: {exc}")
+        return {}
+
+def load_yaml_file(file_path):
+    """Loads a YAML file and returns its content.
+
+    Repeated loads of an unmodified file (e.g. analyze followed by clean in
+    the same run) are served from the parse cache; the mtime in the cache key
+    invalidates entries when the file changes on disk. A shallow copy is
+    returned so callers may mutate the result freely.
+    """
+    data = _load_yaml_cached(file_path, os.path.getmtime(file_path))
+    if not isinstance(data, dict):
+        # Valid YAML but not a mapping (top-level list or scalar); treat it
+        # like any other unusable file and keep going
+        print(f"Error loading {file_path}: expected a mapping, got {type(data).__name__}")
+        return {}
+    return dict(data)
+
+def save_yaml_file(file_path, data):
+    """Saves data to a YAML file."""
+    with open(file_path, 'w') as file:
+        yaml.dump(data, file, Dumper=SafeDumper)
+    # Drop cached parses; the mtime key alone can miss sub-resolution rewrites
+    _load_yaml_cached.cache_clear()